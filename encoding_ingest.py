@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Encoding-aware reading of GetSimple XML pages.
+
+Old mountain.ru/bukovo content can be windows-1251 or KOI8-R instead of
+UTF-8, sometimes only in fragments pasted into an otherwise UTF-8 page.
+read_xml() prefers UTF-8 when the bytes evidently are UTF-8, then a
+non-UTF-8 encoding declared in the XML prolog, and otherwise detects the
+encoding with a byte-histogram heuristic. It transcodes
+once to UTF-8 and records the verdict in a page index next to the source
+dump, so later runs parse known-UTF-8 pages directly. decode_entities()
+fixes double-escaped entities in one pass.
+"""
+
+import atexit
+import codecs
+import html
+import html.entities
+import json
+import re
+import xml.etree.ElementTree as ET
+from collections import Counter
+from pathlib import Path
+
+PAGE_INDEX = Path("getsimple-html/page-index.json")
+
+# One or more complete, well-formed UTF-8 multibyte sequences
+UTF8_RUN = re.compile(rb'(?:[\xc2-\xdf][\x80-\xbf]|\xe0[\xa0-\xbf][\x80-\xbf]|[\xe1-\xec\xee\xef][\x80-\xbf]{2}'
+                      rb'|\xed[\x80-\x9f][\x80-\xbf]|\xf0[\x90-\xbf][\x80-\xbf]{2}'
+                      rb'|[\xf1-\xf3][\x80-\xbf]{3}|\xf4[\x80-\x8f][\x80-\xbf]{2})+')
+HIGH_RUN = re.compile(rb'[\x80-\xff]+')
+XML_DECLARATION = re.compile(rb'^(\s*<\?xml[^>]*?encoding=)(["\'])([^"\']*)\2')
+# &amp;nbsp; &amp;amp;#39; ... -> &nbsp; &#39; (any depth of escaping), but
+# only in front of something that is an entity: ?a=1&amp;copy=2 stays as is
+STACKED_AMP = re.compile(r'&(?:amp;)+(?=(#[0-9]+;|#[xX][0-9a-fA-F]+;|[A-Za-z][A-Za-z0-9]*;))')
+
+# A windows-1251 "Р"/"С" (0xD0/0xD1) followed by any byte in 0x80-0xBF is
+# valid UTF-8 for U+0400-U+047F, so a lone such pair proves nothing. Next to
+# another Cyrillic letter it is real UTF-8; everything else well-formed
+# (° « é nbsp) is kept as UTF-8 too.
+CYRILLIC = re.compile('[\u0400-\u04ff]+')
+CYRILLIC_LETTERS = re.compile('[\u0400-\u04ff]{2,}')
+CYRILLIC_WORD = re.compile('[\u0400-\u04ff]{3,}')
+CP1251_TRAP = re.compile('[\u0400-\u047f]')
+
+
+def has_utf8_text(data):
+    """True if data contains at least one UTF-8 Cyrillic word."""
+    return any(CYRILLIC_WORD.search(match.group().decode('utf-8'))
+               for match in UTF8_RUN.finditer(data))
+
+
+def utf8_pieces(text, whole_run):
+    """Split a decoded UTF-8 run into (is_utf8, bytes), demoting cp1251 traps."""
+    # Characters inside a Cyrillic word are genuine; so is a whole run
+    # between ASCII bytes that is Cyrillic (a one-letter word such as "И")
+    protected = set()
+    if whole_run and CYRILLIC.fullmatch(text):
+        protected.update(range(len(text)))
+    for word in CYRILLIC_LETTERS.finditer(text):
+        protected.update(range(word.start(), word.end()))
+
+    pieces = []
+    for i, ch in enumerate(text):
+        is_utf8 = i in protected or not CP1251_TRAP.match(ch)
+        if pieces and pieces[-1][0] == is_utf8:
+            pieces[-1][1].append(ch)
+        else:
+            pieces.append((is_utf8, [ch]))
+    for is_utf8, chars in pieces:
+        yield is_utf8, ''.join(chars).encode('utf-8')
+
+
+def split_fragments(data):
+    """Yield (is_utf8, bytes) for every run of non-ASCII bytes in data."""
+    for run in HIGH_RUN.finditer(data):
+        run = run.group()
+        pos = 0
+        for match in UTF8_RUN.finditer(run):
+            if match.start() > pos:
+                yield False, run[pos:match.start()]
+            whole_run = len(match.group()) == len(run)
+            yield from utf8_pieces(match.group().decode('utf-8'), whole_run)
+            pos = match.end()
+        if pos < len(run):
+            yield False, run[pos:]
+
+
+def guess_legacy_codec(data):
+    """Pick the Cyrillic 8-bit codec from a byte histogram.
+
+    Russian text is mostly lowercase: windows-1251 puts а-я at 0xE0-0xFF,
+    KOI8-R at 0xC0-0xDF.
+    """
+    counts = Counter(data)
+    cp1251 = sum(counts[b] for b in range(0xE0, 0x100))
+    koi8 = sum(counts[b] for b in range(0xC0, 0xE0))
+    return 'cp1251' if cp1251 >= koi8 else 'koi8_r'
+
+
+def declared_encoding(data):
+    """Codec name from the XML declaration, or None if absent or unknown."""
+    match = XML_DECLARATION.match(data)
+    if not match:
+        return None
+    try:
+        return codecs.lookup(match.group(3).decode('ascii')).name
+    except (LookupError, UnicodeDecodeError):
+        return None
+
+
+def detect_encoding(data):
+    """Return (encoding, mixed) for raw page bytes."""
+    try:
+        data.decode('utf-8')
+        utf8_valid = True
+    except UnicodeDecodeError:
+        utf8_valid = False
+
+    # windows-1251/KOI8-R accept almost any byte, so a declaration is only
+    # trusted when the data is not evidently UTF-8 (valid, with Cyrillic words)
+    declared = declared_encoding(data)
+    legacy_declared = declared and declared != 'utf-8'
+    if utf8_valid and (not legacy_declared or has_utf8_text(data)):
+        return 'utf-8', False
+    if legacy_declared:
+        try:
+            data.decode(declared)
+            return declared, False
+        except UnicodeDecodeError:
+            pass  # mislabelled: fall through to the heuristic
+    if utf8_valid:
+        return 'utf-8', False
+
+    # Only split into fragments when the page really contains UTF-8 text;
+    # otherwise the whole file is in one legacy codec
+    if not has_utf8_text(data):
+        return guess_legacy_codec(data), False
+
+    utf8 = False
+    legacy = []
+    for is_utf8, chunk in split_fragments(data):
+        if is_utf8:
+            utf8 = True
+        else:
+            legacy.append(chunk)
+    return guess_legacy_codec(b''.join(legacy)), utf8
+
+
+def transcode(data, encoding, mixed):
+    """Decode page bytes to str using a detect_encoding() verdict."""
+    if not mixed:
+        return data.decode(encoding, errors='replace')
+
+    # Keep ASCII and UTF-8 fragments, decode the rest with the legacy codec
+    parts = []
+    pos = 0
+    for run in HIGH_RUN.finditer(data):
+        parts.append(data[pos:run.start()].decode('ascii'))
+        for is_utf8, chunk in split_fragments(run.group()):
+            parts.append(chunk.decode('utf-8' if is_utf8 else encoding, errors='replace'))
+        pos = run.end()
+    parts.append(data[pos:].decode('ascii'))
+    return ''.join(parts)
+
+
+class PageIndex:
+    """Encoding verdicts per source file, invalidated by size and mtime."""
+
+    def __init__(self, path=PAGE_INDEX):
+        self.path = Path(path)
+        self.pages = {}
+        self.dirty = False
+        if self.path.exists():
+            try:
+                self.pages = json.loads(self.path.read_text(encoding='utf-8'))
+            except ValueError:
+                self.pages = {}
+
+    def get(self, xml_path):
+        entry = self.pages.get(str(xml_path))
+        stat = Path(xml_path).stat()
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['encoding'], entry['mixed']
+        return None
+
+    def set(self, xml_path, encoding, mixed):
+        stat = Path(xml_path).stat()
+        self.pages[str(xml_path)] = {
+            'encoding': encoding,
+            'mixed': mixed,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+        }
+        self.dirty = True
+
+    def save(self):
+        if self.dirty and self.path.parent.is_dir():
+            self.path.write_text(json.dumps(self.pages, ensure_ascii=False, indent=1, sort_keys=True),
+                                 encoding='utf-8')
+            self.dirty = False
+
+
+_default_index = None
+
+
+def default_index():
+    """Page index shared by a script run, saved when the script exits."""
+    global _default_index
+    if _default_index is None:
+        _default_index = PageIndex()
+        atexit.register(_default_index.save)
+    return _default_index
+
+
+def read_xml(xml_path, index=None):
+    """Parse a GetSimple XML page whatever its encoding; return the root element."""
+    if index is None:
+        index = default_index()
+
+    # The data handed to expat is always UTF-8 by now, whatever the
+    # prolog claims (it may be a mislabelled UTF-8 file)
+    verdict = index.get(xml_path)
+    if verdict == ('utf-8', False):
+        # Known clean UTF-8: let expat decode it directly
+        return ET.parse(xml_path, parser=ET.XMLParser(encoding='utf-8')).getroot()
+
+    data = Path(xml_path).read_bytes()
+    if verdict is None:
+        verdict = detect_encoding(data)
+        index.set(xml_path, *verdict)
+    if verdict != ('utf-8', False):
+        data = transcode(data, *verdict).encode('utf-8')
+        data = XML_DECLARATION.sub(rb'\1\2UTF-8\2', data, count=1)
+    return ET.fromstring(data, parser=ET.XMLParser(encoding='utf-8'))
+
+
+def collapse_stacked_amp(text, replacement):
+    """Replace each &amp;amp;... that precedes a real entity with replacement."""
+    def collapse(match):
+        entity = match.group(1)
+        if entity.startswith('#') or entity in html.entities.html5:
+            return replacement
+        return match.group()
+    return STACKED_AMP.sub(collapse, text)
+
+
+def decode_entities(text):
+    """Decode HTML entities however many times they were escaped, in one pass.
+
+    GetSimple stores page HTML entity-escaped, and some imported posts were
+    escaped again (&amp;nbsp;), so a single html.unescape() is not enough.
+    """
+    if not text:
+        return ""
+    return html.unescape(collapse_stacked_amp(text, '&'))
+
+
+def unescape_markup(text):
+    """Undo GetSimple's storage escaping but leave the HTML's own entities single.
+
+    For converters that feed the result to HTMLParser, which decodes the
+    remaining entities itself.
+    """
+    if not text:
+        return ""
+    return html.unescape(collapse_stacked_amp(text, '&amp;'))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Reusable output buffer for the HTML -> markdown converters.
+
+Collapses runs of spaces and blank lines while text is written instead of
+joining a list and running regex passes over the whole page afterwards, so
+one converter instance can be reset and reused across a batch run.
+"""
+
+import io
+import re
+
+SPACE_RUN = re.compile(r' {2,}')
+NEWLINE_RUN = re.compile(r'\n{3,}')
+
+
+class MarkdownBuffer:
+    """StringIO that keeps at most one space and two newlines in a row."""
+
+    def __init__(self):
+        self._buf = io.StringIO()
+        self.reset()
+
+    def reset(self):
+        self._buf.seek(0)
+        self._buf.truncate()
+        self.last = None      # last raw chunk written, before collapsing
+        self._space = False   # output currently ends with ' '
+        self._newlines = 0    # trailing '\n' count in the output (max 2)
+
+    def __bool__(self):
+        return self.last is not None
+
+    def write(self, chunk):
+        self.last = chunk
+
+        # Leading whitespace of the page is stripped
+        if self._buf.tell() == 0:
+            chunk = chunk.lstrip()
+        if not chunk:
+            return
+
+        # Collapse inside the chunk, then across the boundary with the output
+        if '  ' in chunk:
+            chunk = SPACE_RUN.sub(' ', chunk)
+        if '\n\n\n' in chunk:
+            chunk = NEWLINE_RUN.sub('\n\n', chunk)
+        if self._space and chunk[0] == ' ':
+            chunk = chunk[1:]
+        elif self._newlines and chunk[0] == '\n':
+            leading = len(chunk) - len(chunk.lstrip('\n'))
+            excess = self._newlines + leading - 2
+            if excess > 0:
+                chunk = chunk[excess:]
+        if not chunk:
+            return
+
+        self._buf.write(chunk)
+        self._space = chunk[-1] == ' '
+        trailing = len(chunk) - len(chunk.rstrip('\n'))
+        if trailing == len(chunk):
+            self._newlines = min(2, self._newlines + trailing)
+        else:
+            self._newlines = trailing
+
+    def getvalue(self):
+        return self._buf.getvalue().rstrip()
@@ -1,18 +1,26 @@
 #!/usr/bin/env python3
 """Migrate bukovo_net forum pages from GetSimple XML to Hugo markdown."""
 
-import xml.etree.ElementTree as ET
-import html
-import os
-import re
+import argparse
 from pathlib import Path
 from html.parser import HTMLParser
 
+from encoding_ingest import read_xml, unescape_markup
+from markdown_buffer import MarkdownBuffer
+from output_backends import BACKENDS, report_unreferenced_static
+
 class HTMLToMarkdown(HTMLParser):
     """Convert HTML to clean markdown text."""
-    def __init__(self):
+    def __init__(self, emit_images=False):
+        self.emit_images = emit_images
+        self.text = MarkdownBuffer()
         super().__init__()
-        self.text = []
+
+    def reset(self):
+        """Clear all state so the instance can convert the next page."""
+        super().reset()
+        self.text.reset()
+        self.images = []  # <img src> values, in document order
         self.in_paragraph = False
 
     def handle_starttag(self, tag, attrs):
@@ -20,32 +28,37 @@ class HTMLToMarkdown(HTMLParser):
             self.in_paragraph = True
         elif tag == 'br':
             # Use actual line break to preserve formatting (poetry, lists, etc.)
-            self.text.append('  \n')  # Two spaces + newline = markdown line break
+            self.text.write('  \n')  # Two spaces + newline = markdown line break
+        elif tag == 'img':
+            attrs_dict = dict(attrs)
+            src = attrs_dict.get('src')
+            if src:
+                self.images.append(src)
+                if self.emit_images:
+                    self.text.write(f"![{attrs_dict.get('alt') or ''}]({src})")
 
     def handle_endtag(self, tag):
         if tag == 'p':
             if self.in_paragraph:
-                self.text.append('\n\n')
+                self.text.write('\n\n')
             self.in_paragraph = False
 
     def handle_data(self, data):
-        # Decode HTML entities and strip leading/trailing whitespace from each chunk
-        decoded = html.unescape(data).strip()
+        # Entities are already decoded (convert_charrefs); strip each chunk
+        decoded = data.strip()
         if decoded:  # Only add non-empty text
-            self.text.append(decoded)
+            self.text.write(decoded)
 
     def get_text(self):
-        result = ''.join(self.text)
-        # Clean up multiple spaces
-        result = re.sub(r' {2,}', ' ', result)
-        # Clean up excessive newlines
-        result = re.sub(r'\n{3,}', '\n\n', result)
-        return result.strip()
-
-def xml_to_markdown(xml_path):
-    """Convert GetSimple XML to Hugo markdown."""
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
+        # Spaces and newlines were already collapsed while writing
+        return self.text.getvalue()
+
+def xml_to_markdown(xml_path, emit_images=False, parser=None):
+    """Convert GetSimple XML to Hugo markdown.
+
+    Pass a parser to reuse one converter instance across a batch of pages.
+    """
+    root = read_xml(xml_path)
 
     # Extract metadata
     title_elem = root.find('.//title')
@@ -71,12 +84,17 @@ def xml_to_markdown(xml_path):
     content_elem = root.find('.//content')
     raw_content = content_elem.text if content_elem is not None and content_elem.text else ""
 
-    # First, unescape XML entities to get actual HTML
-    html_content = html.unescape(raw_content)
+    # First, undo GetSimple's entity escaping to get actual HTML
+    html_content = unescape_markup(raw_content)
 
     # Then parse HTML to markdown
-    parser = HTMLToMarkdown()
+    if parser is None:
+        parser = HTMLToMarkdown(emit_images=emit_images)
+    else:
+        parser.emit_images = emit_images
+        parser.reset()
     parser.feed(html_content)
+    parser.close()  # flush text HTMLParser holds back after a trailing '&'
     content = parser.get_text()
 
     # Build markdown
@@ -89,19 +107,24 @@ type: "text"
 {content}
 """
 
-    return md, url, parent
+    return md, url, parent, parser.images
 
 def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--layout', choices=sorted(BACKENDS), default='flat',
+                            help="flat: slug.md; bundle: slug/index.md with referenced images")
+    args = arg_parser.parse_args()
+
     source_dir = Path("getsimple-html/data/pages")
     target_base = Path("content/texts/bukovo-net")
     target_base.mkdir(parents=True, exist_ok=True)
+    backend = BACKENDS[args.layout](target_base)
 
     # Find all bukovo_net pages
     bukovo_pages = []
     for xml_file in source_dir.glob("*.xml"):
         try:
-            tree = ET.parse(xml_file)
-            root = tree.getroot()
+            root = read_xml(xml_file)
             parent_elem = root.find('.//parent')
             if parent_elem is not None and parent_elem.text == "bukovo_net":
                 bukovo_pages.append(xml_file)
@@ -112,10 +135,12 @@ def main():
 
     migrated = 0
     skipped = 0
+    # One converter for the whole batch, reset between pages
+    parser = HTMLToMarkdown(emit_images=backend.wants_images)
 
     for xml_path in sorted(bukovo_pages):
         try:
-            md_content, url, parent = xml_to_markdown(xml_path)
+            md_content, url, parent, images = xml_to_markdown(xml_path, backend.wants_images, parser)
 
             if not url:
                 print(f"Skipping {xml_path.name} - no URL")
@@ -123,17 +148,18 @@ def main():
                 continue
 
             # Target markdown file
-            md_path = target_base / f"{url}.md"
+            md_path = backend.page_path(url)
 
-            # Check if already exists
-            if md_path.exists():
-                print(f"Skipping {url}.md - already exists")
+            # Check if already exists, in either layout
+            existing = backend.existing_page(url)
+            if existing:
+                print(f"Skipping {md_path} - {existing} already exists")
                 skipped += 1
                 continue
 
-            # Write markdown
-            md_path.write_text(md_content, encoding='utf-8')
-            print(f"Created {url}.md")
+            # Write markdown (and, for bundles, the images it references)
+            backend.write(url, md_content, images)
+            print(f"Created {md_path}")
             migrated += 1
 
         except Exception as e:
@@ -143,6 +169,7 @@ def main():
     print(f"\nMigration complete:")
     print(f"  Migrated: {migrated}")
     print(f"  Skipped: {skipped}")
+    report_unreferenced_static(backend)
 
 if __name__ == "__main__":
     main()
@@ -1,18 +1,26 @@
 #!/usr/bin/env python3
 """Migrate climbing route pages from GetSimple XML to Hugo markdown."""
 
-import xml.etree.ElementTree as ET
-import html
-import os
-import re
+import argparse
 from pathlib import Path
 from html.parser import HTMLParser
 
+from encoding_ingest import read_xml, unescape_markup
+from markdown_buffer import MarkdownBuffer
+from output_backends import BACKENDS, FlatBackend, report_unreferenced_static
+
 class RouteHTMLToMarkdown(HTMLParser):
     """Convert route HTML to markdown with proper structure."""
-    def __init__(self):
+    def __init__(self, emit_images=False):
+        self.emit_images = emit_images
+        self.text = MarkdownBuffer()
         super().__init__()
-        self.text = []
+
+    def reset(self):
+        """Clear all state so the instance can convert the next page."""
+        super().reset()
+        self.text.reset()
+        self.images = []  # <img src> values, in document order
         self.in_paragraph = False
         self.in_bold_p = False
         self.in_list = False
@@ -27,78 +35,82 @@ class RouteHTMLToMarkdown(HTMLParser):
             # Check if it's a bold paragraph (heading)
             if attrs_dict.get('class') == 'b':
                 # Add spacing before heading if there's previous content
-                if self.text and not self.text[-1].endswith('\n\n'):
-                    self.text.append('\n\n')
+                if self.text and not self.text.last.endswith('\n\n'):
+                    self.text.write('\n\n')
                 self.in_bold_p = True
             else:
                 self.in_paragraph = True
         elif tag == 'br':
-            self.text.append('  \n')
+            self.text.write('  \n')
         elif tag == 'ol':
             self.in_list = True
             self.list_item_count = 0
         elif tag == 'li':
             # Close previous list item if it wasn't explicitly closed
             if self.in_list_item:
-                self.text.append('\n')
+                self.text.write('\n')
             self.in_list_item = True
             self.list_item_count += 1
             self.list_item_has_content = False
         elif tag == 'h2':
-            self.text.append('\n## ')
+            self.text.write('\n## ')
+        elif tag == 'img':
+            src = attrs_dict.get('src')
+            if src:
+                self.images.append(src)
+                if self.emit_images:
+                    self.text.write(f"![{attrs_dict.get('alt') or ''}]({src})")
 
     def handle_endtag(self, tag):
         if tag == 'p':
             if self.in_bold_p:
-                self.text.append('\n\n')
+                self.text.write('\n\n')
                 self.in_bold_p = False
             elif self.in_paragraph:
-                self.text.append('\n\n')
+                self.text.write('\n\n')
                 self.in_paragraph = False
         elif tag == 'ol':
             # Make sure we're not treating subsequent content as list items
             if self.in_list_item:
-                self.text.append('\n')
+                self.text.write('\n')
             self.in_list = False
             self.in_list_item = False
-            self.text.append('\n')
+            self.text.write('\n')
         elif tag == 'li':
-            self.text.append('\n')
+            self.text.write('\n')
             self.in_list_item = False
         elif tag == 'h2':
-            self.text.append('\n\n')
+            self.text.write('\n\n')
 
     def handle_data(self, data):
-        decoded = html.unescape(data).strip()
+        decoded = data.strip()
         if not decoded:
             return
 
         # If it's a bold paragraph (heading), make it a heading
         if self.in_bold_p:
-            self.text.append(f'### {decoded}')
+            self.text.write(f'### {decoded}')
         # If it's a list item, add numbered markdown list syntax only once
         elif self.in_list_item:
             if not self.list_item_has_content:
-                self.text.append(f'{self.list_item_count}. {decoded}')
+                self.text.write(f'{self.list_item_count}. {decoded}')
                 self.list_item_has_content = True
             else:
                 # Subsequent content within same list item (after <br>)
-                self.text.append(decoded)
+                self.text.write(decoded)
         else:
-            self.text.append(decoded)
+            self.text.write(decoded)
 
     def get_text(self):
-        result = ''.join(self.text)
-        # Clean up multiple spaces
-        result = re.sub(r' {2,}', ' ', result)
-        # Clean up excessive newlines
-        result = re.sub(r'\n{3,}', '\n\n', result)
-        return result.strip()
-
-def xml_to_markdown(xml_path):
-    """Convert GetSimple XML to Hugo markdown."""
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
+        # Spaces and newlines were already collapsed while writing
+        return self.text.getvalue()
+
+def xml_to_markdown(xml_path, emit_images=False, parser=None):
+    """Convert GetSimple XML to Hugo markdown.
+
+    Pass a parser to reuse one converter instance across a batch of pages.
+    """
+    root = read_xml(xml_path)
 
     # Extract metadata
     title_elem = root.find('.//title')
@@ -123,12 +135,17 @@ def xml_to_markdown(xml_path):
     content_elem = root.find('.//content')
     raw_content = content_elem.text if content_elem is not None and content_elem.text else ""
 
-    # First, unescape XML entities to get actual HTML
-    html_content = html.unescape(raw_content)
+    # First, undo GetSimple's entity escaping to get actual HTML
+    html_content = unescape_markup(raw_content)
 
     # Then parse HTML to markdown
-    parser = RouteHTMLToMarkdown()
+    if parser is None:
+        parser = RouteHTMLToMarkdown(emit_images=emit_images)
+    else:
+        parser.emit_images = emit_images
+        parser.reset()
     parser.feed(html_content)
+    parser.close()  # flush text HTMLParser holds back after a trailing '&'
     content = parser.get_text()
 
     # Build markdown
@@ -141,43 +158,53 @@ type: "text"
 {content}
 """
 
-    return md, url, parent
+    return md, url, parent, parser.images
 
 def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--layout', choices=sorted(BACKENDS), default='flat',
+                            help="flat: slug.md; bundle: slug/index.md with referenced images")
+    args = arg_parser.parse_args()
+
     source_dir = Path("getsimple-html/data/pages")
 
-    # Migrate arkhiz_routes index page
+    # Migrate arkhiz_routes index page. It stays flat in every layout: a
+    # bundle at arkhiz_routes/index.md would swallow the route pages below.
     routes_xml = source_dir / "arkhiz_routes.xml"
     if routes_xml.exists():
-        md_content, url, parent = xml_to_markdown(routes_xml)
-        target_path = Path("content/texts/arkhiz_routes.md")
-        target_path.write_text(md_content, encoding='utf-8')
+        md_content, url, parent, images = xml_to_markdown(routes_xml)
+        target_path = FlatBackend("content/texts").write("arkhiz_routes", md_content)
         print(f"Created {target_path}")
 
     # Migrate individual route pages
     route_slugs = ['tokmak', 'chuchhur', 'magana', 'pshish', 'psish_vost']
     route_dir = Path("content/texts/arkhiz_routes")
     route_dir.mkdir(parents=True, exist_ok=True)
+    backend = BACKENDS[args.layout](route_dir)
 
     migrated = 0
+    # One converter for the whole batch, reset between pages
+    parser = RouteHTMLToMarkdown(emit_images=backend.wants_images)
     for slug in route_slugs:
         xml_path = source_dir / f"{slug}.xml"
         if not xml_path.exists():
             print(f"Skipping {slug} - XML not found")
             continue
 
-        md_content, url, parent = xml_to_markdown(xml_path)
-        md_path = route_dir / f"{slug}.md"
+        md_content, url, parent, images = xml_to_markdown(xml_path, backend.wants_images, parser)
+        md_path = backend.page_path(slug)
 
-        if md_path.exists():
-            print(f"Skipping {slug}.md - already exists")
+        existing = backend.existing_page(slug)
+        if existing:
+            print(f"Skipping {md_path} - {existing} already exists")
             continue
 
-        md_path.write_text(md_content, encoding='utf-8')
-        print(f"Created {slug}.md")
+        backend.write(slug, md_content, images)
+        print(f"Created {md_path}")
         migrated += 1
 
     print(f"\nMigration complete: {migrated + 1} pages")
+    report_unreferenced_static(backend)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""Dry-run support for the migration scripts: render in memory, diff against disk.
+
+Converters hand their planned writes to DryRun instead of writing files.
+report() compares each one with the existing file. It checks size and hash
+first and only diffs files that changed, block by block (posts/paragraphs
+separated by blank lines). Two writers targeting the same path are reported
+as a conflict.
+
+Run directly to dry-run every converter that overwrites content/texts and
+catch conflicts between scripts (e.g. both tlavina converters). The exit
+status is 1 when there are conflicts, so CI can run it:
+
+    python migration_diff.py --diff
+"""
+
+import argparse
+import difflib
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+
+def add_dry_run_args(arg_parser):
+    """Add the shared --dry-run/--diff options to a script's argument parser."""
+    arg_parser.add_argument('--dry-run', action='store_true',
+                            help="render in memory and report what would change, write nothing")
+    arg_parser.add_argument('--diff', action='store_true',
+                            help="print unified diffs of changed blocks (implies --dry-run)")
+
+
+def digest(data):
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def split_blocks(lines):
+    """Split markdown lines into posts/paragraphs separated by blank lines.
+
+    Returns (text, start, end) per block, start/end being line indexes, so
+    hunks can be reported at their real position in the file.
+    """
+    blocks = []
+    start = None
+    for i, line in enumerate(lines + ['']):
+        if line.strip():
+            if start is None:
+                start = i
+        elif start is not None:
+            blocks.append((''.join(lines[start:i]), start, i))
+            start = None
+    return blocks
+
+
+def span(blocks, first, last):
+    """Line range covered by blocks[first:last]; empty ranges sit after blocks[first - 1]."""
+    if first < last:
+        return blocks[first][1], blocks[last - 1][2]
+    at = blocks[first - 1][2] if first else 0
+    return at, at
+
+
+def line_opcodes(old_lines, new_lines, old_start, old_end, new_start, new_end):
+    """Line-level opcodes for one region, in whole-file coordinates."""
+    old_slice = old_lines[old_start:old_end]
+    new_slice = new_lines[new_start:new_end]
+    if old_slice == new_slice:
+        return [('equal', old_start, old_end, new_start, new_end)] if old_slice else []
+    matcher = difflib.SequenceMatcher(None, old_slice, new_slice, autojunk=False)
+    return [(tag, i1 + old_start, i2 + old_start, j1 + new_start, j2 + new_start)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes()]
+
+
+class OpcodeMatcher(difflib.SequenceMatcher):
+    """SequenceMatcher over precomputed opcodes, for get_grouped_opcodes()."""
+
+    def __init__(self, opcodes):
+        super().__init__(None, [], [])
+        self.opcodes = opcodes
+
+    def get_opcodes(self):
+        return self.opcodes
+
+
+def hunk_range(start, length):
+    """Unified diff range: 'start,length' (1-based; empty ranges point before)."""
+    if length == 1:
+        return str(start + 1)
+    return f"{start + 1 if length else start},{length}"
+
+
+def block_diff(old_text, new_text, path, context=2):
+    """Unified diff of a changed file, matching lines only inside changed blocks.
+
+    Blocks (posts/paragraphs) are matched first; line-level matching runs only
+    on the regions between blocks that differ, so a one-post edit in a long
+    thread costs one small diff. Hunks carry real file line numbers.
+    """
+    old_lines = old_text.splitlines(keepends=True)
+    new_lines = new_text.splitlines(keepends=True)
+    old_blocks = split_blocks(old_lines)
+    new_blocks = split_blocks(new_lines)
+    matcher = difflib.SequenceMatcher(None, [b[0] for b in old_blocks], [b[0] for b in new_blocks],
+                                      autojunk=False)
+
+    # Tile both files with opcodes: unchanged blocks (and the blank lines
+    # around them) are 'equal' regions, changed blocks get a line diff
+    opcodes = []
+    old_pos = new_pos = 0
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != 'equal':
+            continue
+        for i, j in zip(range(i1, i2), range(j1, j2)):
+            old_start, old_end = old_blocks[i][1], old_blocks[i][2]
+            new_start, new_end = new_blocks[j][1], new_blocks[j][2]
+            opcodes += line_opcodes(old_lines, new_lines, old_pos, old_start, new_pos, new_start)
+            opcodes.append(('equal', old_start, old_end, new_start, new_end))
+            old_pos, new_pos = old_end, new_end
+    opcodes += line_opcodes(old_lines, new_lines, old_pos, len(old_lines), new_pos, len(new_lines))
+    if not opcodes:
+        opcodes = [('equal', 0, 0, 0, 0)]
+
+    lines = [f"--- a/{path}\n", f"+++ b/{path}\n"]
+    for group in OpcodeMatcher(opcodes).get_grouped_opcodes(context):
+        first, last = group[0], group[-1]
+        lines.append(f"@@ -{hunk_range(first[1], last[2] - first[1])} "
+                     f"+{hunk_range(first[3], last[4] - first[3])} @@\n")
+        for tag, i1, i2, j1, j2 in group:
+            if tag == 'equal':
+                lines.extend(' ' + line for line in old_lines[i1:i2])
+                continue
+            lines.extend('-' + line for line in old_lines[i1:i2])
+            lines.extend('+' + line for line in new_lines[j1:j2])
+    return ''.join(line if line.endswith('\n') else line + '\n' for line in lines)
+
+
+class DryRun:
+    """Collect planned writes and compare them with what is on disk."""
+
+    def __init__(self):
+        self.planned = {}  # normalised path -> [(writer, content), ...]
+
+    def add(self, writer, path, content):
+        key = os.path.normpath(path)
+        self.planned.setdefault(key, []).append((writer, content))
+
+    def conflicts(self):
+        """Paths written by more than one writer with different content."""
+        return {path: writes for path, writes in self.planned.items()
+                if len({content for _, content in writes}) > 1}
+
+    def report(self, show_diff=False):
+        """Print a summary (and diffs); return the number of files that would change."""
+        new_files, changed, unchanged = [], [], []
+
+        for path, writes in sorted(self.planned.items()):
+            # The last writer wins, as it would when the scripts run in order
+            content = writes[-1][1]
+            target = Path(path)
+            if not target.exists():
+                new_files.append(path)
+                continue
+
+            new_bytes = content.encode('utf-8')
+            if target.stat().st_size == len(new_bytes) and digest(target.read_bytes()) == digest(new_bytes):
+                unchanged.append(path)
+                continue
+
+            changed.append(path)
+            if show_diff:
+                old_text = target.read_text(encoding='utf-8', errors='replace')
+                print(block_diff(old_text, content, path), end='')
+
+        for path in new_files:
+            print(f"New:       {path}")
+        for path in changed:
+            print(f"Changed:   {path}")
+
+        conflicts = self.conflicts()
+        for path, writes in sorted(conflicts.items()):
+            writers = ', '.join(writer for writer, _ in writes)
+            print(f"Conflict:  {path} - written differently by {writers}")
+
+        print(f"\nDry run: {len(new_files)} new, {len(changed)} changed, "
+              f"{len(unchanged)} unchanged, {len(conflicts)} conflicts")
+        return len(new_files) + len(changed)
+
+
+def main():
+    import parse_after_nahar
+    import parse_tlavina_forum
+
+    arg_parser = argparse.ArgumentParser(description="Dry-run all overwriting converters.")
+    arg_parser.add_argument('--diff', action='store_true',
+                            help="print unified diffs of changed blocks")
+    args = arg_parser.parse_args()
+
+    dry_run = DryRun()
+    for module in (parse_after_nahar, parse_tlavina_forum):
+        for md_path, md in module.render_pages():
+            dry_run.add(f"{module.__name__}.py", md_path, md)
+    dry_run.report(show_diff=args.diff)
+    sys.exit(1 if dry_run.conflicts() else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Output backends for the GetSimple -> Hugo migration scripts.
+
+FlatBackend keeps the original layout (content/.../slug.md, images stay in
+static/). BundleBackend writes Hugo leaf bundles (content/.../slug/index.md)
+and places next to index.md the local images the page references, so Hugo
+can process and fingerprint them as page resources.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+from pathlib import Path
+from urllib.parse import quote, urlparse, unquote
+
+# Hosts the original site was served from; images linked through them are local
+SITE_HOSTS = {'', 'andrey-bychkov.ru', 'www.andrey-bychkov.ru'}
+
+# Where referenced images can be found on disk, checked in order
+DEFAULT_ASSET_ROOTS = [
+    Path("getsimple-html"),  # /data/uploads/... from the original CMS
+    Path("static"),          # /images/... already copied for Hugo
+]
+
+
+def is_site_url(src):
+    """True if src points at the original site rather than another host."""
+    parsed = urlparse(src)
+    return parsed.scheme in ('', 'http', 'https') and parsed.netloc.lower() in SITE_HOSTS
+
+
+def resolve_asset(src, asset_roots=DEFAULT_ASSET_ROOTS):
+    """Map an <img src> to a local file, or None if it is remote or missing."""
+    if not is_site_url(src):
+        return None
+
+    rel_path = unquote(urlparse(src).path).lstrip('/')
+    if not rel_path:
+        return None
+
+    for root in asset_roots:
+        candidate = root / rel_path
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def file_digest(path):
+    digest = hashlib.blake2b()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.digest()
+
+
+def link_or_copy(src, dst, hardlink=True):
+    """Hardlink (or copy) src to dst, replacing a dst with different content."""
+    if dst.exists():
+        if os.path.samefile(src, dst) or file_digest(src) == file_digest(dst):
+            return
+        dst.unlink()
+    if hardlink:
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass  # e.g. across filesystems
+    shutil.copy2(src, dst)
+
+
+def unique_name(name, taken):
+    """name, or name-1, name-2, ... if another image already uses it."""
+    stem, suffix = os.path.splitext(name)
+    candidate = name
+    counter = 1
+    while candidate in taken:
+        candidate = f"{stem}-{counter}{suffix}"
+        counter += 1
+    return candidate
+
+
+class FlatBackend:
+    """Write each page as target_dir/slug.md (original layout)."""
+
+    # Converters only emit ![](...) for <img> when the backend can host them
+    wants_images = False
+
+    def __init__(self, target_dir):
+        self.target_dir = Path(target_dir)
+
+    def page_path(self, slug):
+        return self.target_dir / f"{slug}.md"
+
+    def existing_page(self, slug):
+        """Path of the page in either layout if it exists, else None.
+
+        A flat slug.md next to a bundle slug/index.md gives Hugo two pages
+        with the same permalink, so neither layout may write over the other.
+        """
+        for path in (self.target_dir / f"{slug}.md", self.target_dir / slug / "index.md"):
+            if path.exists():
+                return path
+        return None
+
+    def write(self, slug, md_content, images=()):
+        md_path = self.page_path(slug)
+        md_path.parent.mkdir(parents=True, exist_ok=True)
+        md_path.write_text(md_content, encoding='utf-8')
+        return md_path
+
+
+class BundleBackend(FlatBackend):
+    """Write each page as a leaf bundle: target_dir/slug/index.md + images."""
+
+    wants_images = True
+
+    def __init__(self, target_dir, asset_roots=DEFAULT_ASSET_ROOTS, hardlink=True,
+                 static_dir=Path("static")):
+        super().__init__(target_dir)
+        self.asset_roots = [Path(root) for root in asset_roots]
+        self.hardlink = hardlink
+        self.static_dir = Path(static_dir)
+        self.bundled_static = set()  # static/ files now also shipped in a bundle
+
+    def page_path(self, slug):
+        return self.target_dir / slug / "index.md"
+
+    def write(self, slug, md_content, images=()):
+        md_path = self.page_path(slug)
+        bundle_dir = md_path.parent
+        bundle_dir.mkdir(parents=True, exist_ok=True)
+
+        # Copy only the images this page references and point links at them
+        names = {}  # bundle file name -> local source file
+        for src in dict.fromkeys(images):
+            local = resolve_asset(src, self.asset_roots)
+            if local is None:
+                if is_site_url(src):
+                    # The Hugo site has no /data/uploads/...; drop the dead link
+                    print(f"Warning: {md_path}: image {src} not found, link dropped")
+                    md_content = re.sub(r'!\[[^\]]*\]\(' + re.escape(src) + r'\)', '', md_content)
+                continue
+
+            name = next((n for n, path in names.items() if path == local), None)
+            if name is None:
+                name = unique_name(local.name, names)
+                names[name] = local
+                link_or_copy(local, bundle_dir / name, self.hardlink)
+            if self.static_dir in local.parents:
+                self.bundled_static.add(local)
+            md_content = md_content.replace(f']({src})', f']({quote(name)})')
+
+        md_path.write_text(md_content, encoding='utf-8')
+        return md_path
+
+
+def report_unreferenced_static(backend, search_dirs=(Path("content"), Path("layouts"))):
+    """Print static/ files that bundling copied and nothing else links to any more.
+
+    Hugo publishes static/ as-is, so these are shipped twice until removed.
+    """
+    bundled = getattr(backend, 'bundled_static', set())
+    if not bundled:
+        return []
+
+    urls = {path: '/' + path.relative_to(backend.static_dir).as_posix() for path in bundled}
+    texts = [f.read_text(encoding='utf-8', errors='replace')
+             for root in search_dirs for f in Path(root).rglob('*')
+             if f.is_file() and f.suffix in ('.md', '.html', '.toml', '.yaml')]
+    unreferenced = sorted(path for path, url in urls.items()
+                          if not any(url in text or quote(url) in text for text in texts))
+
+    if unreferenced:
+        print(f"\n{len(unreferenced)} static files are now only used from page bundles "
+              f"and can be removed from {backend.static_dir}/:")
+        for path in unreferenced:
+            print(f"  {path}")
+    return unreferenced
+
+
+BACKENDS = {
+    'flat': FlatBackend,
+    'bundle': BundleBackend,
+}
@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 """Convert After Nahar section XML files to Hugo markdown."""
 
-import xml.etree.ElementTree as ET
-import html
+import argparse
 import re
+import sys
+
+from encoding_ingest import decode_entities, read_xml
+from migration_diff import DryRun, add_dry_run_args
 
 
 def clean_html(text):
@@ -11,16 +14,8 @@ def clean_html(text):
     if not text:
         return ""
 
-    # Decode HTML entities (multiple passes to catch nested entities)
-    text = html.unescape(text)
-    text = html.unescape(text)  # Second pass for double-encoded entities
-
-    # Replace common entities that might remain
-    text = text.replace('&nbsp;', ' ')
-    text = text.replace('&amp;', '&')
-    text = text.replace('&lt;', '<')
-    text = text.replace('&gt;', '>')
-    text = text.replace('&quot;', '"')
+    # Decode HTML entities, including double-encoded ones, in one pass
+    text = decode_entities(text)
 
     # Replace <br /> with line breaks
     text = text.replace('<br />', '\n')
@@ -85,8 +80,7 @@ def clean_html(text):
 
 def parse_xml(xml_path):
     """Parse GetSimple XML and extract content."""
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
+    root = read_xml(xml_path)
 
     title = root.find('.//title').text
     content = root.find('.//content').text
@@ -120,14 +114,37 @@ files = [
     ('mem_bukovonet', 'getsimple-html/data/pages/mem_bukovonet.xml', 'content/texts/mem_bukovonet.md'),
 ]
 
-for name, xml_path, md_path in files:
-    print(f"Processing {name}...")
-    title, content = parse_xml(xml_path)
-    md = create_markdown(title, content)
 
-    with open(md_path, 'w', encoding='utf-8') as f:
-        f.write(md)
+def render_pages(verbose=False):
+    """Yield (md_path, markdown) for every file without writing anything."""
+    for name, xml_path, md_path in files:
+        if verbose:
+            print(f"Processing {name}...")
+        title, content = parse_xml(xml_path)
+        yield md_path, create_markdown(title, content)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    add_dry_run_args(arg_parser)
+    args = arg_parser.parse_args()
+
+    # A diff preview must never overwrite anything
+    if args.dry_run or args.diff:
+        dry_run = DryRun()
+        for md_path, md in render_pages():
+            dry_run.add('parse_after_nahar.py', md_path, md)
+        dry_run.report(show_diff=args.diff)
+        sys.exit(1 if dry_run.conflicts() else 0)
+
+    for md_path, md in render_pages(verbose=True):
+        with open(md_path, 'w', encoding='utf-8') as f:
+            f.write(md)
+
+        print(f"  Created {md_path}")
+
+    print(f"\nDone! Created {len(files)} markdown files.")
 
-    print(f"  Created {md_path}")
 
-print("\nDone! Created 7 markdown files.")
+if __name__ == "__main__":
+    main()
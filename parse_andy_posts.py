@@ -1,18 +1,17 @@
 #!/usr/bin/env python3
-import xml.etree.ElementTree as ET
-import html
 import re
 
+from encoding_ingest import decode_entities, read_xml
+
 def parse_forum_xml(xml_path):
     """Parse GetSimple XML and extract forum posts"""
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
+    root = read_xml(xml_path)
 
     title = root.find('.//title').text
     content = root.find('.//content').text
 
-    # Decode HTML entities
-    content = html.unescape(content)
+    # Decode HTML entities, including double-encoded ones, in one pass
+    content = decode_entities(content)
 
     # Split into posts - each post is in a <p> tag
     posts = []
@@ -23,8 +22,8 @@ def parse_forum_xml(xml_path):
             # Clean up HTML tags but preserve structure
             post_text = post_html.replace('<br />', '\n')
             post_text = re.sub(r'<[^>]+>', '', post_text)
-            # Clean up &nbsp; entities
-            post_text = post_text.replace('&nbsp;', ' ')
+            # Non-breaking spaces become plain spaces
+            post_text = post_text.replace('\xa0', ' ')
             # Remove leading/trailing whitespace and dedent
             lines = [line.strip() for line in post_text.split('\n')]
             # Join with single line breaks (markdown needs 2 spaces at end for <br>)
@@ -1,18 +1,17 @@
 #!/usr/bin/env python3
-import xml.etree.ElementTree as ET
-import html
 import sys
 import re
 
+from encoding_ingest import decode_entities, read_xml
+
 def parse_forum_post(xml_file):
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
+    root = read_xml(xml_file)
 
     title = root.find('title').text
     content = root.find('content').text
 
-    # Decode HTML entities
-    content = html.unescape(content)
+    # Decode HTML entities, including double-encoded ones, in one pass
+    content = decode_entities(content)
 
     # Parse paragraphs
     paragraphs = re.findall(r'<p[^>]*>(.*?)</p>', content, re.DOTALL)
@@ -22,7 +21,7 @@ def parse_forum_post(xml_file):
         # Clean HTML tags but preserve line breaks
         p = re.sub(r'<br\s*/?\s*>', '\n', p)
         p = re.sub(r'<[^>]+>', '', p)
-        p = re.sub(r'&nbsp;', ' ', p)
+        p = p.replace('\xa0', ' ')
         p = p.strip()
 
         if p:
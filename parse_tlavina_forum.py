@@ -1,29 +1,23 @@
 #!/usr/bin/env python3
 """Convert tlavina XML to forum-style markdown."""
 
-import xml.etree.ElementTree as ET
-import html
+import argparse
 import re
+import sys
+
+from encoding_ingest import decode_entities, read_xml
+from migration_diff import DryRun, add_dry_run_args
 
 
 def parse_xml(xml_path):
     """Parse GetSimple XML and extract content."""
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
+    root = read_xml(xml_path)
 
     title = root.find('.//title').text
     content = root.find('.//content').text
 
-    # Decode HTML entities
-    content = html.unescape(content)
-    content = html.unescape(content)  # Second pass
-
-    # Replace common entities
-    content = content.replace('&nbsp;', ' ')
-    content = content.replace('&amp;', '&')
-    content = content.replace('&lt;', '<')
-    content = content.replace('&gt;', '>')
-    content = content.replace('&quot;', '"')
+    # Decode HTML entities, including double-encoded ones, in one pass
+    content = decode_entities(content)
 
     # Replace <br /> with line breaks
     content = content.replace('<br />', '\n')
@@ -117,16 +111,38 @@ type: "forum"
     return md
 
 
-# Process the file
 xml_path = 'getsimple-html/data/pages/tlavina.xml'
 md_path = 'content/texts/tlavina.md'
 
-print("Processing tlavina...")
-title, content = parse_xml(xml_path)
-md = create_markdown(title, content)
 
-with open(md_path, 'w', encoding='utf-8') as f:
-    f.write(md)
+def render_pages(verbose=False):
+    """Yield (md_path, markdown) without writing anything."""
+    if verbose:
+        print("Processing tlavina...")
+    title, content = parse_xml(xml_path)
+    yield md_path, create_markdown(title, content)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    add_dry_run_args(arg_parser)
+    args = arg_parser.parse_args()
+
+    # A diff preview must never overwrite anything
+    if args.dry_run or args.diff:
+        dry_run = DryRun()
+        for path, md in render_pages():
+            dry_run.add('parse_tlavina_forum.py', path, md)
+        dry_run.report(show_diff=args.diff)
+        sys.exit(1 if dry_run.conflicts() else 0)
+
+    for path, md in render_pages(verbose=True):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(md)
+
+        print(f"  Created {path}")
+    print("Done!")
+
 
-print(f"  Created {md_path}")
-print("Done!")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""Report content statistics and page weight for the generated site.
+
+Walks content/, static/ and docs/ in parallel and computes for every page
+its body size, post count, referenced images and their size, and the
+estimated first-view transfer size of the page after gzip (and brotli if
+the module is installed). Gallery originals, which only load when opened
+in the lightbox, are reported separately as lazy images. Pages over budget are flagged; --json writes the full
+report for trend tracking in CI.
+
+    python site_report.py --json page-weight.json --strict
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CONTENT_DIR = Path("content")
+STATIC_DIR = Path("static")
+DOCS_DIR = Path("docs")
+
+# Image references in front matter ("/images/...jpg") and markdown (...jpg)
+IMAGE_REF = re.compile(r'''["'(<]([^"'()<>\n]+?\.(?:jpe?g|png|gif|webp|svg))(?:\?[^"'()<>\s]*)?[>"')]''',
+                       re.IGNORECASE)
+# Gallery originals (front matter "full:") only load when opened in the lightbox
+LAZY_IMAGE_REF = re.compile(r'''^\s*(?:-\s*)?full:\s*["']?([^"'\n]+?)["']?\s*$''', re.MULTILINE)
+PAGE_TYPE = re.compile(r'''^type:\s*["']?([\w-]+)''', re.MULTILINE)
+
+# How posts are marked, per content format
+POST_SEPARATOR = re.compile(r'^---\s*$', re.MULTILINE)  # type "forum"
+# bukovo.net thread dumps: "bicheps Горец Чт Янв 06, 2005 13:58"
+BUKOVO_POST_HEADER = re.compile(r'^\S.*\b(?:Пн|Вт|Ср|Чт|Пт|Сб|Вс) [А-Яа-я]{3} \d{1,2}, \d{4} \d{1,2}:\d{2}\s*$',
+                                re.MULTILINE)
+HEADING = re.compile(r'^### ', re.MULTILINE)  # type "texts" (e.g. remember.md)
+
+DEFAULT_BUDGETS = {
+    'body_kb': 50,
+    'images': 40,
+    'image_kb': 3000,
+    'transfer_kb': 3500,
+}
+
+
+def index_sizes(root):
+    """Map every file under root (as a /-rooted URL path) to its size."""
+    sizes = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            url = '/' + os.path.relpath(path, root).replace(os.sep, '/')
+            sizes[url] = os.path.getsize(path)
+    return sizes
+
+
+def split_front_matter(text):
+    """Return (front_matter, body) of a Hugo markdown file."""
+    if text.startswith('---\n'):
+        end = text.find('\n---', 4)
+        if end != -1:
+            return text[4:end], text[end + 4:].lstrip('\n')
+    return '', text
+
+
+def page_url(md_path):
+    """URL path Hugo publishes a content file under."""
+    rel = md_path.relative_to(CONTENT_DIR).with_suffix('')
+    if rel.name in ('_index', 'index'):
+        rel = rel.parent
+    return '/' + rel.as_posix() + '/' if rel.parts else '/'
+
+
+def image_size(ref, md_path, static_sizes, docs_sizes):
+    """Size of a referenced image in bytes, or None if it is not local."""
+    parsed = urlparse(ref)
+    if parsed.scheme or parsed.netloc:
+        return None
+    path = unquote(parsed.path)
+    if not path.startswith('/'):
+        # Page-relative: a resource of a page bundle
+        local = md_path.parent / path
+        return local.stat().st_size if local.is_file() else None
+    return static_sizes.get(path, docs_sizes.get(path))
+
+
+def count_posts(page_type, body):
+    """Number of posts in a page, or None if its format has no posts."""
+    if not body.strip():
+        return None
+    if page_type == 'forum':
+        return len(POST_SEPARATOR.findall(body)) + 1
+    headers = len(BUKOVO_POST_HEADER.findall(body))
+    if headers:
+        return headers
+    if page_type == 'texts':
+        return len(HEADING.findall(body)) or None
+    return None
+
+
+def analyze_page(md_path, static_sizes, docs_sizes):
+    text = md_path.read_text(encoding='utf-8', errors='replace')
+    front_matter, body = split_front_matter(text)
+    body_bytes = len(body.encode('utf-8'))
+    type_match = PAGE_TYPE.search(front_matter)
+    page_type = type_match.group(1) if type_match else None
+
+    # Images loaded with the page vs. gallery originals loaded on click
+    lazy = set(LAZY_IMAGE_REF.findall(front_matter))
+    refs = list(dict.fromkeys(IMAGE_REF.findall(text)))
+    images = [ref for ref in refs if ref not in lazy]
+    lazy_images = [ref for ref in refs if ref in lazy]
+
+    missing = []
+
+    def total_size(image_refs):
+        total = 0
+        for ref in image_refs:
+            size = image_size(ref, md_path, static_sizes, docs_sizes)
+            if size is None:
+                missing.append(ref)
+            else:
+                total += size
+        return total
+
+    image_bytes = total_size(images)
+    lazy_image_bytes = total_size(lazy_images)
+
+    # Estimate transfer from the published HTML when it exists
+    url = page_url(md_path)
+    html_path = DOCS_DIR / url.lstrip('/') / 'index.html'
+    payload = html_path.read_bytes() if html_path.is_file() else text.encode('utf-8')
+    gzip_bytes = len(gzip.compress(payload, compresslevel=6))
+    brotli_bytes = len(brotli.compress(payload)) if brotli else None
+
+    return {
+        'path': md_path.as_posix(),
+        'url': url,
+        'body_bytes': body_bytes,
+        'type': page_type,
+        'posts': count_posts(page_type, body),
+        'images': len(images),
+        'image_bytes': image_bytes,
+        'lazy_images': len(lazy_images),
+        'lazy_image_bytes': lazy_image_bytes,
+        'remote_or_missing_images': len(missing),
+        'html_bytes': len(payload) if html_path.is_file() else None,
+        'gzip_bytes': gzip_bytes,
+        'brotli_bytes': brotli_bytes,
+        'transfer_bytes': (brotli_bytes or gzip_bytes) + image_bytes,
+    }
+
+
+def over_budget(page, budgets):
+    """Names of the budgets a page exceeds."""
+    checks = {
+        'body_kb': page['body_bytes'] / 1024,
+        'images': page['images'],
+        'image_kb': page['image_bytes'] / 1024,
+        'transfer_kb': page['transfer_bytes'] / 1024,
+    }
+    return [name for name, value in checks.items() if value > budgets[name]]
+
+
+def build_report(budgets, workers=None):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        static_future = pool.submit(index_sizes, STATIC_DIR)
+        docs_future = pool.submit(index_sizes, DOCS_DIR)
+        md_files = sorted(CONTENT_DIR.rglob('*.md'))
+        static_sizes = static_future.result()
+        docs_sizes = docs_future.result()
+        pages = list(pool.map(lambda p: analyze_page(p, static_sizes, docs_sizes), md_files))
+
+    for page in pages:
+        page['over_budget'] = over_budget(page, budgets)
+
+    return {
+        'budgets': budgets,
+        'totals': {
+            'pages': len(pages),
+            'body_bytes': sum(p['body_bytes'] for p in pages),
+            'image_bytes': sum(p['image_bytes'] for p in pages),
+            'lazy_image_bytes': sum(p['lazy_image_bytes'] for p in pages),
+            'transfer_bytes': sum(p['transfer_bytes'] for p in pages),
+            'static_bytes': sum(static_sizes.values()),
+            'docs_bytes': sum(docs_sizes.values()),
+            'over_budget': sum(1 for p in pages if p['over_budget']),
+        },
+        'pages': pages,
+    }
+
+
+def print_report(report, top=15):
+    def kb(n):
+        return f"{n / 1024:.0f}" if n is not None else '-'
+
+    pages = sorted(report['pages'], key=lambda p: p['transfer_bytes'], reverse=True)
+    print(f"{'page':<52} {'body KB':>8} {'posts':>6} {'imgs':>5} {'img KB':>8} {'lazy KB':>8} "
+          f"{'gz KB':>6} {'xfer KB':>8}")
+    for page in pages[:top]:
+        flag = ' !' if page['over_budget'] else ''
+        posts = page['posts'] if page['posts'] is not None else '-'
+        print(f"{page['path']:<52} {kb(page['body_bytes']):>8} {posts:>6} {page['images']:>5} "
+              f"{kb(page['image_bytes']):>8} {kb(page['lazy_image_bytes']):>8} "
+              f"{kb(page['gzip_bytes']):>6} {kb(page['transfer_bytes']):>8}{flag}")
+
+    totals = report['totals']
+    print(f"\n{totals['pages']} pages, {kb(totals['transfer_bytes'])} KB estimated transfer, "
+          f"static/ {kb(totals['static_bytes'])} KB, docs/ {kb(totals['docs_bytes'])} KB")
+
+    flagged = [p for p in pages if p['over_budget']]
+    if flagged:
+        print(f"\nOver budget ({len(flagged)}):")
+        for page in flagged:
+            print(f"  {page['path']}: {', '.join(page['over_budget'])}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    for name, default in DEFAULT_BUDGETS.items():
+        arg_parser.add_argument(f"--max-{name.replace('_', '-')}", type=int, default=default,
+                                dest=name, help=f"budget per page (default {default})")
+    arg_parser.add_argument('--json', metavar='PATH', help="write the full report as JSON ('-' for stdout)")
+    arg_parser.add_argument('--top', type=int, default=15, help="heaviest pages to list")
+    arg_parser.add_argument('--workers', type=int, help="thread pool size")
+    arg_parser.add_argument('--strict', action='store_true', help="exit with status 1 if any page is over budget")
+    args = arg_parser.parse_args()
+
+    budgets = {name: getattr(args, name) for name in DEFAULT_BUDGETS}
+    report = build_report(budgets, args.workers)
+
+    if args.json == '-':
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        print_report(report, args.top)
+        if args.json:
+            Path(args.json).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+            print(f"\nWrote {args.json}")
+
+    if args.strict and report['totals']['over_budget']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
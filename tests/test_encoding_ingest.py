@@ -0,0 +1,69 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from encoding_ingest import PageIndex, decode_entities, detect_encoding, read_xml, transcode, unescape_markup
+
+# windows-1251 "Р"/"С" followed by 0x80-0xBF bytes forms valid UTF-8 Cyrillic
+CP1251_TRAPS = [
+    "С\xa0гор",
+    "«СССР»",
+    "Сёма … Рёв",
+]
+
+
+def roundtrip(text, encoding):
+    data = text.encode(encoding)
+    return detect_encoding(data), transcode(data, *detect_encoding(data))
+
+
+def test_pure_cp1251_is_not_mixed():
+    for text in CP1251_TRAPS:
+        verdict, decoded = roundtrip(f"Старый пост: {text}, конец.", 'cp1251')
+        assert verdict == ('cp1251', False)
+        assert decoded == f"Старый пост: {text}, конец."
+
+
+def test_koi8_and_utf8():
+    assert roundtrip("Привет, мир", 'koi8_r') == (('koi8_r', False), "Привет, мир")
+    assert roundtrip("Привет, мир", 'utf-8') == (('utf-8', False), "Привет, мир")
+
+
+def test_mixed_fragments():
+    data = ("Первый пост. ".encode('utf-8') + "Второй «СССР» пост.".encode('cp1251')
+            + " И снова — утф".encode('utf-8'))
+    encoding, mixed = detect_encoding(data)
+    assert (encoding, mixed) == ('cp1251', True)
+    assert transcode(data, encoding, mixed) == "Первый пост. Второй «СССР» пост. И снова — утф"
+
+
+def test_mixed_keeps_utf8_punctuation():
+    # Well-formed 2-byte UTF-8 (° « » nbsp é) is not a cp1251 trap
+    for utf8_text in ["Погода -20°C, ветер « сильный » ", "Café\xa0на углу. "]:
+        data = utf8_text.encode('utf-8') + "Старый «СССР» пост.".encode('cp1251')
+        encoding, mixed = detect_encoding(data)
+        assert (encoding, mixed) == ('cp1251', True)
+        assert transcode(data, encoding, mixed) == utf8_text + "Старый «СССР» пост."
+
+
+def test_declared_encoding_wins(tmp_path):
+    xml = '<?xml version="1.0" encoding="windows-1251"?><item><title>Сёма</title></item>'
+    xml_path = tmp_path / "page.xml"
+    xml_path.write_bytes(xml.encode('cp1251'))
+    root = read_xml(xml_path, PageIndex(tmp_path / "index.json"))
+    assert root.find('title').text == "Сёма"
+
+
+def test_mislabelled_utf8(tmp_path):
+    xml = '<?xml version="1.0" encoding="windows-1251"?><item><title>Погода -20°C</title></item>'
+    xml_path = tmp_path / "page.xml"
+    xml_path.write_bytes(xml.encode('utf-8'))
+    root = read_xml(xml_path, PageIndex(tmp_path / "index.json"))
+    assert root.find('title').text == "Погода -20°C"
+
+
+def test_entities():
+    assert decode_entities("a&amp;amp;nbsp;b &amp;lt;") == "a\xa0b <"
+    assert unescape_markup("&lt;a href=&quot;?a=1&amp;amp;copy=2&quot;&gt;") == '<a href="?a=1&amp;copy=2">'
+    assert unescape_markup("x&amp;amp;nbsp;y") == "x&nbsp;y"